@@ -2,25 +2,90 @@ import streamlit as st
 import subprocess
 import tempfile
 import json
+import mimetypes
+import hashlib
 import shutil
 import os
+import re
+import time
+import threading
 import zipfile
-import requests
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from io import BytesIO
+from PIL import Image
+
+# Per-sessionid gallery-dl configs kept on disk; older ones are deleted
+GALLERYDL_CONFIGS_KEPT = 32
+
+# gallery-dl start URL for each tab that takes a username
+PROFILE_URL_TEMPLATES = {
+    "posts": "https://www.instagram.com/{}/",
+    "stories": "https://www.instagram.com/stories/{}/",
+    "reels": "https://www.instagram.com/{}/reels/",
+    "tagged": "https://www.instagram.com/{}/tagged/",
+}
+
+# Characters Instagram allows in a username; safe to use as-is in a dir name
+USERNAME_PATTERN = re.compile(r"[A-Za-z0-9._]{1,30}")
+
+# File extensions rendered with st.video instead of st.image
+VIDEO_EXTENSIONS = frozenset({".mp4", ".mov", ".gifv", ".webm", ".mkv", ".avi"})
+
+# Image formats that are already compressed; DEFLATE gains next to nothing on them
+IMAGE_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".webp", ".gif", ".heic"})
+
+# Read size when copying media into a ZIP (ZipFile.write uses 8 KiB)
+ZIP_COPY_CHUNK_SIZE = 1024 * 1024
+
+# How often a running download is re-listed to show the files that have landed
+PREVIEW_POLL_SECONDS = 1.0
+
+# Lines of gallery-dl's stderr kept for the error message when a run fails
+STDERR_TAIL_LINES = 200
+
+# Staging and .old dirs older than this were left behind by a process that exited
+STALE_STAGING_SECONDS = 24 * 60 * 60
+
+# Download dirs not fetched or shown for this long are deleted; well past the
+# 3-minute run cache, so only results nobody is looking at go
+DOWNLOAD_DIR_IDLE_SECONDS = 15 * 60
+
+# Longest side of the grid thumbnails; a column is only a few hundred px wide
+THUMBNAIL_SIZE = 512
+
+# ISO-BMFF brands that are still images (HEIF/AVIF) rather than MP4/MOV video
+IMAGE_FTYP_BRANDS = frozenset({b"heic", b"heix", b"heim", b"heis", b"hevc", b"mif1", b"msf1", b"avif"})
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Helper Functions for Gallery-dl Integration
 # ──────────────────────────────────────────────────────────────────────────────
 
+def _stable_id(value: str) -> str:
+    """
+    Return a 128-bit BLAKE2b hex digest of value. Unlike hash(), this is the
+    same in every interpreter and wide enough not to collide between users,
+    so it is safe for file names and cache keys.
+    """
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=16).hexdigest()
+
+@st.cache_resource(show_spinner=False, validate=lambda cfg_path: cfg_path.is_file())
 def write_gallerydl_config(sessionid: str) -> Path:
     """
     Create a temporary JSON config file for gallery-dl containing only the
     Instagram sessionid cookie. Returns the path to this config file.
+
+    The file is named after a BLAKE2b digest of the sessionid (stable across
+    interpreter restarts, unlike hash()) and cached per sessionid, so reruns
+    reuse the same file instead of rewriting it on every submit.
     """
     cfg_dir = Path(tempfile.gettempdir()) / "gdl_instagram_configs"
     cfg_dir.mkdir(exist_ok=True)
-    cfg_path = cfg_dir / f"{hash(sessionid)}_ig_config.json"
+    cfg_path = cfg_dir / f"{_stable_id(sessionid)}_ig_config.json"
+    if cfg_path.is_file():
+        # Written by an earlier process for the same sessionid.
+        return cfg_path
 
     config_data = {
         "extractor": {
@@ -31,108 +96,484 @@ def write_gallerydl_config(sessionid: str) -> Path:
             }
         }
     }
-    cfg_path.write_text(json.dumps(config_data, indent=2))
+    # Write to a side file and rename it into place, so a concurrent gallery-dl
+    # run never reads a half-written config.
+    tmp_path = cfg_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(config_data, indent=2))
+    tmp_path.replace(cfg_path)
+    _prune_gallerydl_configs(cfg_dir)
     return cfg_path
 
-def run_gallerydl(identifier: str, tab: str, sessionid: str, max_items: int = 100) -> Path:
+def _prune_gallerydl_configs(cfg_dir: Path):
+    """
+    Delete all but the GALLERYDL_CONFIGS_KEPT most recently used config files
+    (run_gallerydl bumps a config's mtime on use), so the cookies of past
+    sessions don't pile up in the temp dir.
+    """
+    configs = []
+    for path in cfg_dir.glob("*_ig_config.json"):
+        try:
+            configs.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            continue
+    configs.sort(reverse=True)
+    for _, path in configs[GALLERYDL_CONFIGS_KEPT:]:
+        path.unlink(missing_ok=True)
+
+def _downloads_root() -> Path:
+    """
+    Return the directory that holds all download, staging and ".old" dirs, so
+    the sweeps below only ever touch this app's own files in the shared temp dir.
+    """
+    return Path(tempfile.gettempdir()) / "gdl_instagram_downloads"
+
+def gallerydl_download_dir(identifier: str, tab: str, max_items: int, session_key: str) -> Path:
+    """
+    Return the directory run_gallerydl downloads identifier/tab into.
+
+    The name covers every input _start_gallerydl_run is cached on, including
+    max_items and session_key (the sessionid digest), so a run with other
+    inputs never replaces the files a cached run handed out. A username is
+    kept readable only if it is a plain Instagram handle; anything else (a
+    pasted "user/", a path with "..") is replaced by its digest, so the name
+    is always a single entry directly in _downloads_root().
+    """
+    run_id = _stable_id(f"{max_items}\n{session_key}")
+    if tab == "highlights":
+        return _downloads_root() / f"ig_highlight_{_stable_id(identifier)}_{run_id}"
+    elif tab == "url":
+        return _downloads_root() / f"ig_url_{_stable_id(identifier)}_{run_id}"
+    else:
+        if not USERNAME_PATTERN.fullmatch(identifier):
+            identifier = _stable_id(identifier)
+        return _downloads_root() / f"ig_{identifier}_{tab}_{run_id}"
+
+def gallerydl_staging_dir(download_dir: Path) -> Path:
+    """
+    Create a fresh, empty directory for one run to download into before it
+    replaces download_dir. Every call gets its own mkdtemp() name, so runs
+    that overlap for the same download_dir never share (or wipe) a staging dir.
+    """
+    download_dir.parent.mkdir(parents=True, exist_ok=True)
+    return Path(tempfile.mkdtemp(prefix=f"{download_dir.name}.", suffix=".partial", dir=download_dir.parent))
+
+def run_gallerydl(
+    identifier: str, tab: str, sessionid: str, max_items: int = 100, staging_dir: Path | None = None
+) -> Path:
     """
     Run gallery-dl for the given Instagram identifier and tab, using the provided sessionid.
     Returns the Path to the directory where media were downloaded.
 
     - identifier:
         • For "posts", "stories", "reels", "tagged": an Instagram username (without '@').
-        • For "highlights" or "url": a full Instagram URL (e.g., post, reel, highlight, story).
+        • For "highlights": a full Instagram highlight URL.
+        • For "url": one or more full Instagram URLs (post, reel, highlight, story, ...),
+          separated by whitespace/newlines. All of them are fetched by a single
+          gallery-dl process, so the interpreter start-up is paid once per batch.
     - tab: one of ["posts", "stories", "reels", "highlights", "tagged", "url"]
     - sessionid: Instagram sessionid cookie string
     - max_items: only used when tab in ["posts", "reels", "tagged"]
+    - staging_dir: empty dir from gallerydl_staging_dir to download into; a new
+      one is created when omitted
     """
-    # 1) Build gallery-dl config
+    # 1) Build gallery-dl config, marking it as recently used for the pruning
+    #    in write_gallerydl_config (and rewriting it if it was just pruned)
     cfg_path = write_gallerydl_config(sessionid)
-
-    # 2) Determine the target URL
-    if tab == "posts":
-        target_url = f"https://www.instagram.com/{identifier}/"
-    elif tab == "stories":
-        target_url = f"https://www.instagram.com/stories/{identifier}/"
-    elif tab == "reels":
-        target_url = f"https://www.instagram.com/{identifier}/reels/"
-    elif tab == "tagged":
-        target_url = f"https://www.instagram.com/{identifier}/tagged/"
-    elif tab in ["highlights", "url"]:
-        target_url = identifier
-    else:
-        raise ValueError("Invalid tab: must be one of ['posts','stories','reels','highlights','tagged','url']")
-
-    # 3) Prepare download directory (unique per identifier+tab)
-    if tab == "highlights":
-        download_dir = Path(tempfile.gettempdir()) / f"ig_highlight_{hash(identifier)}"
+    try:
+        os.utime(cfg_path)
+    except FileNotFoundError:
+        write_gallerydl_config.clear(sessionid)
+        cfg_path = write_gallerydl_config(sessionid)
+
+    # 2) Determine the target URL(s)
+    if tab in PROFILE_URL_TEMPLATES:
+        target_urls = [PROFILE_URL_TEMPLATES[tab].format(identifier)]
+    elif tab == "highlights":
+        target_urls = [identifier]
     elif tab == "url":
-        download_dir = Path(tempfile.gettempdir()) / f"ig_url_{hash(identifier)}"
+        target_urls = identifier.split()
     else:
-        download_dir = Path(tempfile.gettempdir()) / f"ig_{identifier}_{tab}"
+        raise ValueError("Invalid tab: must be one of ['posts','stories','reels','highlights','tagged','url']")
 
-    # If previous run exists, wipe it first
-    if download_dir.exists():
-        shutil.rmtree(download_dir)
-    download_dir.mkdir(parents=True, exist_ok=True)
+    # 3) Prepare download directory (unique per identifier+tab+max_items+sessionid).
+    #    gallery-dl writes into this run's own empty staging dir, so the previous
+    #    complete set stays in place until this run has succeeded.
+    download_dir = gallerydl_download_dir(identifier, tab, max_items, _stable_id(sessionid))
+    if staging_dir is None:
+        staging_dir = gallerydl_staging_dir(download_dir)
 
     # 4) Build gallery-dl command
     cmd = [
         "gallery-dl",
         "--config", str(cfg_path),
-        "--destination", str(download_dir) + os.sep,
-        "--verbose"
+        "--destination", str(staging_dir) + os.sep,
+        "--quiet",
     ]
     if tab in ["posts", "reels", "tagged"]:
         cmd += ["--range", f"0-{max_items}"]
-    cmd.append(target_url)
+    cmd += target_urls
+
+    # 5) Execute gallery-dl. Results are read back from download_dir, so its
+    #    stdout is discarded; with --quiet, stderr only carries error messages,
+    #    of which only the last few are kept for the error report.
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+    try:
+        with subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True) as proc:
+            stderr_tail.extend(proc.stderr)
+        if proc.returncode != 0:
+            raise RuntimeError(f"Download failed (exit {proc.returncode}):\n{''.join(stderr_tail)}")
+
+        # 6) Swap the finished set in for the previous one. The old set is renamed
+        #    aside and deleted in the background, so neither the caller nor anyone
+        #    viewing it waits on (or sees) a half-deleted directory. Readers in this
+        #    process take the same lock, so they never land between the two renames.
+        with _swap_lock():
+            old_dir = _move_aside(download_dir)
+            os.replace(staging_dir, download_dir)
+            # A dir's mtime is its last-used time for _prune_idle_download_dirs
+            os.utime(download_dir)
+        if old_dir is not None:
+            _delete_in_background(old_dir)
+        _prune_idle_download_dirs()
+    finally:
+        # Only still there if gallery-dl failed, could not be started or the
+        # swap itself failed.
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    return download_dir
 
-    # 5) Execute gallery-dl
-    proc = subprocess.run(cmd, capture_output=True, text=True)
-    if proc.returncode != 0:
-        raise RuntimeError(f"Download failed (exit {proc.returncode}):\n{proc.stderr}")
+@st.cache_resource(show_spinner=False)
+def _swap_lock() -> threading.Lock:
+    """
+    Serialises run_gallerydl's swap of a staging dir into place with clearing
+    download dirs and with readers that must not see one mid-swap.
+    """
+    return threading.Lock()
 
-    return download_dir
+def _move_aside(download_dir: Path) -> Path | None:
+    """
+    Rename download_dir to a unique ".old" sibling and return the new path, or
+    None if there is nothing there. Call with _swap_lock() held.
+    """
+    if not download_dir.exists():
+        return None
+    old_dir = download_dir.with_name(f"{download_dir.name}.{time.time_ns()}.old")
+    os.replace(download_dir, old_dir)
+    return old_dir
+
+def _delete_in_background(path: Path):
+    """
+    Delete the directory tree at path on a daemon thread.
+    """
+    threading.Thread(target=shutil.rmtree, args=(path,), kwargs={"ignore_errors": True}, daemon=True).start()
+
+def touch_download_dir(download_dir: Path):
+    """
+    Mark download_dir as just used, so _prune_idle_download_dirs keeps it while
+    a result from it is still being shown.
+    """
+    try:
+        os.utime(download_dir)
+    except FileNotFoundError:
+        pass
+
+def _prune_idle_download_dirs():
+    """
+    Delete download dirs that no run has produced and no session has shown for
+    DOWNLOAD_DIR_IDLE_SECONDS. Every (identifier, tab, max_items, sessionid) gets
+    its own dir, so without this each slider value and each user would keep a
+    full copy of the media for as long as the temp dir lives.
+    """
+    cutoff = time.time() - DOWNLOAD_DIR_IDLE_SECONDS
+    for path in _downloads_root().glob("ig_*"):
+        if path.suffix in (".old", ".partial"):
+            continue
+        with _swap_lock():
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            old_dir = _move_aside(path)
+        if old_dir is not None:
+            _delete_in_background(old_dir)
+
+def _sweep_stale_download_dirs():
+    """
+    Delete .old dirs whose background delete was cut short by the process
+    exiting, and .partial staging dirs too old for any run to still be writing
+    into. Both get the same age check, since another process sharing the
+    downloads root may still be deleting or writing a recent one.
+    """
+    _prune_idle_download_dirs()
+    cutoff = time.time() - STALE_STAGING_SECONDS
+    for pattern in ("*.old", "*.partial"):
+        for path in _downloads_root().glob(pattern):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except FileNotFoundError:
+                continue
+
+@st.cache_resource(show_spinner=False)
+def _download_pool() -> ThreadPoolExecutor:
+    """
+    Worker threads that run gallery-dl in the background, shared by all sessions.
+    Also caps how many gallery-dl processes hit Instagram at once. Created once
+    per process, which is also when an earlier process's leftovers are swept.
+    """
+    _sweep_stale_download_dirs()
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="gallery-dl")
+
+def _run_is_reusable(run: tuple[Future, Path]) -> bool:
+    """
+    Keep runs that are still going or succeeded; drop failed ones and ones
+    whose files have been cleared since, so the next submit starts afresh.
+    """
+    future, _ = run
+    if not future.done():
+        return True
+    if future.exception() is not None:
+        return False
+    with _swap_lock():
+        return future.result().exists()
+
+@st.cache_resource(ttl=180, max_entries=64, show_spinner=False, validate=_run_is_reusable)
+def _start_gallerydl_run(
+    identifier: str, tab: str, max_items: int, session_key: str, _sessionid: str
+) -> tuple[Future, Path]:
+    """
+    Start run_gallerydl on the download pool and return its Future together
+    with the staging dir it downloads into (for the live preview). Streamlit
+    does not hash underscore-prefixed arguments, so the cache is keyed on
+    session_key (a digest) rather than on the raw sessionid cookie.
+    """
+    staging_dir = gallerydl_staging_dir(gallerydl_download_dir(identifier, tab, max_items, session_key))
+    future = _download_pool().submit(run_gallerydl, identifier, tab, _sessionid, max_items, staging_dir)
+    return future, staging_dir
+
+def fetch_media(
+    identifier: str, tab: str, sessionid: str, max_items: int = 100, preview=None, refresh=False
+) -> Path:
+    """
+    Return the download directory for identifier/tab, re-running gallery-dl only
+    when no run with the same inputs started within the last few minutes.
+    Takes the same arguments as run_gallerydl, plus an optional preview
+    placeholder (st.empty()) that shows the files that have landed so far
+    while the download is still running. refresh=True discards a finished
+    cached run and downloads again; a run still in progress is joined instead.
+
+    Joining only saves a duplicate download: a second run for the same inputs
+    can still start once the cached one has expired, so overlap safety comes
+    from every run having its own staging dir (see gallerydl_staging_dir).
+    """
+    run_args = (identifier, tab, max_items, _stable_id(sessionid), sessionid)
+    future, staging_dir = _start_gallerydl_run(*run_args)
+    if refresh and future.done():
+        _start_gallerydl_run.clear(*run_args)
+        future, staging_dir = _start_gallerydl_run(*run_args)
+    if preview is not None:
+        shown = []
+        try:
+            while not future.done():
+                time.sleep(PREVIEW_POLL_SECONDS)
+                media_files = list_downloaded_media(staging_dir)
+                if media_files != shown:
+                    with preview.container():
+                        display_media_grid_from_paths(media_files, n_cols=3, preview=True)
+                    shown = media_files
+        finally:
+            preview.empty()
+    return future.result()
+
+def forget_media(identifier: str, tab: str, sessionid: str, max_items: int = 100):
+    """
+    Drop the cached run for these fetch_media arguments, so a run that is still
+    in flight can't hand its files back to the next fetch after they were cleared.
+    """
+    _start_gallerydl_run.clear(identifier, tab, max_items, _stable_id(sessionid), sessionid)
 
 def list_downloaded_media(download_dir: Path) -> list[Path]:
     """
     Return a sorted list of Path objects for each file in download_dir and its subdirectories.
+    Skips gallery-dl's in-progress ".part" files.
+
+    Walks the tree with os.scandir, whose entries answer is_file()/is_dir() from
+    the directory listing instead of one extra stat() per file. Holds the swap
+    lock, so a run_gallerydl swap in progress is waited out rather than seen as
+    an empty (cleared) dir.
     """
-    if not download_dir.exists():
-        return []
-    return sorted(p for p in download_dir.rglob("*") if p.is_file())
+    with _swap_lock():
+        return _walk_media(download_dir)
+
+def _walk_media(download_dir: Path) -> list[Path]:
+    """
+    list_downloaded_media's scandir walk, without the lock.
+    """
+    found = []
+    pending = [str(download_dir)]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file() and not entry.name.endswith(".part"):
+                        found.append(entry.path)
+        except FileNotFoundError:
+            # Not created yet, or removed while a preview was listing it.
+            continue
+    found.sort()
+    return [Path(p) for p in found]
 
 def create_zip_buffer(file_paths: list[Path]) -> BytesIO:
     """
     Given a list of Path objects, create an in-memory ZIP (BytesIO) containing them.
+
+    Photos and videos are already compressed, so they are stored as-is and
+    copied in large chunks; only other files (e.g. metadata sidecars) go
+    through a fast level-1 DEFLATE.
+
+    Entries are flat (just the file name); a name that repeats across
+    subfolders gets a numeric suffix instead of shadowing the earlier entry.
+    A file that disappears before it is read is skipped; both branches open
+    it before starting its entry, so the archive stays consistent.
     """
     buffer = BytesIO()
-    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+    used_names = set()
+    with zipfile.ZipFile(buffer, "w") as zf:
         for file_path in file_paths:
-            zf.write(file_path, arcname=file_path.name)
+            arcname = file_path.name
+            n = 1
+            while arcname in used_names:
+                arcname = f"{file_path.stem}_{n}{file_path.suffix}"
+                n += 1
+
+            try:
+                if is_video_file(file_path) or file_path.suffix.lower() in IMAGE_EXTENSIONS:
+                    info = zipfile.ZipInfo.from_file(file_path, arcname=arcname)
+                    info.compress_type = zipfile.ZIP_STORED
+                    with open(file_path, "rb") as src, zf.open(info, "w") as dst:
+                        shutil.copyfileobj(src, dst, ZIP_COPY_CHUNK_SIZE)
+                else:
+                    zf.write(
+                        file_path,
+                        arcname=arcname,
+                        compress_type=zipfile.ZIP_DEFLATED,
+                        compresslevel=1,
+                    )
+            except FileNotFoundError:
+                continue
+            used_names.add(arcname)
     buffer.seek(0)
     return buffer
 
+@st.cache_resource(ttl=600, max_entries=4, show_spinner=False)
+def _cached_zip_bytes(fingerprint: tuple, _file_paths: list[Path]) -> bytes:
+    """
+    create_zip_buffer's bytes, built once per distinct file set. cache_resource (not
+    cache_data) so hits hand back the same immutable bytes instead of unpickling a copy.
+    """
+    return create_zip_buffer(_file_paths).getvalue()
+
+def zip_bytes_for(file_paths: list[Path]) -> bytes:
+    """
+    Return the ZIP of file_paths, reusing the last build while none of the files
+    has been added, removed, resized or rewritten since. Files deleted since
+    they were listed (Clear, a re-download replacing the set) are left out.
+    """
+    fingerprint = []
+    present = []
+    for p in file_paths:
+        try:
+            stat = p.stat()
+        except FileNotFoundError:
+            continue
+        fingerprint.append((str(p), stat.st_size, stat.st_mtime_ns))
+        present.append(p)
+    return _cached_zip_bytes(tuple(fingerprint), present)
+
+def single_file_bytes(file_path: Path) -> bytes:
+    """
+    Return the contents of file_path, the file the button was rendered for, so
+    its bytes always match the offered name and MIME type. Raises
+    FileNotFoundError with a readable message if it was cleared or replaced by
+    a re-download since the render.
+    """
+    try:
+        return file_path.read_bytes()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"{file_path.name} is no longer on the server; fetch it again.") from None
+
 def clear_downloaded_folder(download_dir: Path) -> bool:
     """
     If the folder exists, delete it and return True. Otherwise return False.
+    The folder is renamed aside under the swap lock first, so a run finishing
+    at the same time never swaps its set into a half-deleted tree.
     """
-    if download_dir.exists():
-        shutil.rmtree(download_dir)
-        return True
-    return False
+    with _swap_lock():
+        old_dir = _move_aside(download_dir)
+    if old_dir is None:
+        return False
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return True
 
 def is_video_file(file_path: Path) -> bool:
     """
     Return True if the local file’s extension indicates a video.
     """
-    ext = file_path.suffix.lower()
-    return ext in [".mp4", ".mov", ".gifv", ".webm", ".mkv", ".avi"]
+    return file_path.suffix.lower() in VIDEO_EXTENSIONS
 
-def display_media_grid_from_paths(file_paths: list[Path], n_cols: int = 3):
+def has_video_signature(file_path: Path) -> bool:
+    """
+    Return True if the file's first bytes are an MP4/MOV, Matroska/WebM or AVI
+    header. Only consulted when a file without a video extension won't open as
+    an image, so the common path never reads the file here.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            head = f.read(12)
+    except OSError:
+        return False
+    if head[4:8] == b"ftyp":
+        return head[8:12] not in IMAGE_FTYP_BRANDS
+    return head.startswith(b"\x1a\x45\xdf\xa3") or (head[:4] == b"RIFF" and head[8:12] == b"AVI ")
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def make_thumbnail(file_path: Path, mtime_ns: int) -> bytes | None:
+    """
+    Return a JPEG of file_path scaled down to THUMBNAIL_SIZE on its longest side,
+    or None if Pillow can't read it. mtime_ns is only part of the cache key, so a
+    re-downloaded file with the same name gets a fresh thumbnail. Transparent
+    images are flattened onto white, since JPEG has no alpha channel.
+    """
+    try:
+        with Image.open(file_path) as img:
+            # Lets the JPEG decoder skip straight to a reduced scale
+            img.draft("RGB", (THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+            img.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+            if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+                rgba = img.convert("RGBA")
+                flat = Image.new("RGB", rgba.size, "white")
+                flat.paste(rgba, mask=rgba.getchannel("A"))
+            else:
+                flat = img.convert("RGB")
+            buffer = BytesIO()
+            flat.save(buffer, format="JPEG", quality=85)
+    except (OSError, ValueError):
+        return None
+    return buffer.getvalue()
+
+def display_media_grid_from_paths(file_paths: list[Path], n_cols: int = 3, preview: bool = False):
     """
     Given a list of local Paths, display them in a grid of n_cols columns per row.
-    Uses st.columns() and calls st.image(...) or st.video(...) without width arguments.
+    Uses st.columns() and calls st.image(...) or st.video(...) sized to fill each column.
+    Still images are shown as cached thumbnails; GIFs stay as-is to keep animating,
+    and files that turn out to be videos despite their extension get a player.
+
+    With preview=True (the live grid fetch_media redraws on every new file), videos
+    and GIFs are listed by name only: Streamlit reads and hashes the whole file for
+    each st.video/st.image of a path, which would re-read every earlier video on
+    each redraw. Thumbnails are cached, so still images are shown as usual.
     """
     if not file_paths:
         return
@@ -141,13 +582,136 @@ def display_media_grid_from_paths(file_paths: list[Path], n_cols: int = 3):
         cols = st.columns(len(chunk))
         for col, path in zip(cols, chunk):
             try:
-                if is_video_file(path):
+                if preview and (is_video_file(path) or path.suffix.lower() == ".gif"):
+                    col.caption(f"🎞️ {path.name}")
+                elif is_video_file(path):
                     col.video(str(path), format="video/mp4")
+                elif path.suffix.lower() == ".gif":
+                    col.image(str(path), width="stretch")
                 else:
-                    col.image(str(path), use_container_width=True)
+                    thumbnail = make_thumbnail(path, path.stat().st_mtime_ns)
+                    if thumbnail is not None:
+                        col.image(thumbnail, width="stretch")
+                    elif preview:
+                        col.caption(f"🎞️ {path.name}")
+                    elif has_video_signature(path):
+                        col.video(str(path))
+                    else:
+                        col.image(str(path), width="stretch")
             except Exception as e:
                 col.write(f"⚠️ Could not display {path.name}: {e}")
 
+def fetch_tab_result(
+    result_key: str, identifier: str, tab: str, max_items: int = 100, *,
+    refresh: bool, progress: str, no_results: str, summary: str, zip_name: str,
+):
+    """
+    Handle a tab's Fetch/Re-download submit: run fetch_media with a live preview and
+    store the outcome under st.session_state[result_key] for show_download_result.
+    - progress: shown while gallery-dl runs
+    - no_results: warning shown if nothing was downloaded
+    - summary: completes "✅ Downloaded N ...", e.g. "posts for @natgeo."
+    - zip_name: file name offered by the ZIP download button
+    """
+    status_msg = st.info(progress)
+    preview = st.empty()
+    try:
+        download_dir = fetch_media(
+            identifier, tab, st.session_state.sessionid, max_items,
+            preview=preview, refresh=refresh,
+        )
+        media_files = list_downloaded_media(download_dir)
+    except RuntimeError as e:
+        status_msg.empty()
+        st.error(f"Error: {e}")
+        return
+    except Exception as e:
+        status_msg.empty()
+        st.error(f"Unexpected error: {e}")
+        return
+
+    status_msg.empty()
+    if not media_files:
+        st.warning(no_results)
+        return
+
+    st.session_state[result_key] = {
+        "download_dir": download_dir,
+        "fetch_args": (identifier, tab, st.session_state.sessionid, max_items),
+        "summary": f"✅ Downloaded {len(media_files)} {summary}",
+        "zip_name": zip_name,
+    }
+
+def _clear_download_result(result_key: str, noun: str):
+    """
+    on_click callback for a tab's Clear button: drop its stored result, its cached
+    run and its files, leaving a notice for show_download_result to display on the
+    rerun. The run is forgotten first, so one still finishing can't bring the
+    result back; clear_downloaded_folder takes the swap lock itself.
+    """
+    result = st.session_state.pop(result_key, None)
+    if result is not None:
+        forget_media(*result["fetch_args"])
+    if result is not None and clear_downloaded_folder(result["download_dir"]):
+        st.session_state[f"{result_key}_notice"] = (
+            True, f"All downloaded {noun} files have been cleared from server storage."
+        )
+    else:
+        st.session_state[f"{result_key}_notice"] = (False, f"No downloaded {noun} folder found to clear.")
+
+def show_download_result(result_key: str, clear_label: str, noun: str):
+    """
+    Render the fetch result stored in st.session_state[result_key] (summary, media grid,
+    ZIP download, or the file itself if there is only one, and a Clear button). Keeping
+    it in session state, rather than only drawing it on the submit run, means it
+    survives the reruns its own buttons trigger.
+    """
+    notice = st.session_state.pop(f"{result_key}_notice", None)
+    if notice is not None:
+        cleared, message = notice
+        (st.success if cleared else st.warning)(message)
+
+    result = st.session_state.get(result_key)
+    if result is None:
+        return
+    media_files = list_downloaded_media(result["download_dir"])
+    if not media_files:
+        # Cleared, or pruned after sitting idle (see _prune_idle_download_dirs)
+        del st.session_state[result_key]
+        return
+    touch_download_dir(result["download_dir"])
+
+    st.success(result["summary"])
+
+    # 1) Display media grid
+    display_media_grid_from_paths(media_files, n_cols=3)
+
+    # 2) ZIP download for convenience (only “Download All”). The archive is built
+    #    from whatever is on disk when the button is clicked, not on every render,
+    #    and the click doesn't rerun the tab.
+    #    A single file is offered as itself; wrapping it in a ZIP only adds a step.
+    download_dir = result["download_dir"]
+    if len(media_files) == 1:
+        (only_file,) = media_files
+        st.download_button(
+            label="💾 Download File",
+            data=lambda: single_file_bytes(only_file),
+            file_name=only_file.name,
+            mime=mimetypes.guess_type(only_file.name)[0] or "application/octet-stream",
+            on_click="ignore",
+        )
+    else:
+        st.download_button(
+            label="💾 Download All as ZIP",
+            data=lambda: zip_bytes_for(list_downloaded_media(download_dir)),
+            file_name=result["zip_name"],
+            mime="application/zip",
+            on_click="ignore",
+        )
+
+    # 3) “Clear Media” button to remove files from server storage
+    st.button(clear_label, on_click=_clear_download_result, args=(result_key, noun))
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Streamlit App
 # ──────────────────────────────────────────────────────────────────────────────
@@ -223,7 +787,8 @@ tab_posts, tab_stories, tab_reels, tab_highlights, tab_tagged, tab_url = st.tabs
 # ──────────────────────────────────────────────────────────────────────────────
 # Posts Tab
 # ──────────────────────────────────────────────────────────────────────────────
-with tab_posts:
+@st.fragment
+def posts_tab():
     st.subheader("Download & Display User Posts (Grid View)")
     with st.form(key="posts_form"):
         username_posts = st.text_input(
@@ -237,62 +802,40 @@ with tab_posts:
             help="Limits how many of the most recent posts to download."
         )
         submit_posts = st.form_submit_button(label="Fetch Posts")
+        refresh_posts = st.form_submit_button(
+            label="🔄 Re-download",
+            help="Ignore the result of a recent identical fetch and download again."
+        )
 
-    if submit_posts:
+    if submit_posts or refresh_posts:
+        st.session_state.pop("result_posts", None)
         if not st.session_state.sessionid:
             st.error("Cannot proceed. Please provide a sessionid above.")
         elif not username_posts:
             st.error("Please enter a username to download their posts.")
         else:
-            status_msg = st.info(f"⏳ Downloading posts for @{username_posts} …")
-            try:
-                download_dir = run_gallerydl(
-                    username_posts, "posts", st.session_state.sessionid, max_posts
-                )
-                media_files = list_downloaded_media(download_dir)
-
-                status_msg.empty()
-                if not media_files:
-                    st.warning(
-                        "No posts were downloaded. "
-                        "Check the username and sessionid, then try again."
-                    )
-                    st.stop()
-
-                st.success(f"✅ Downloaded {len(media_files)} posts for @{username_posts}.")
-
-                # 1) Display media grid
-                display_media_grid_from_paths(media_files, n_cols=3)
-
-                # 2) ZIP download for convenience (only “Download All”)
-                zip_buffer = create_zip_buffer(media_files)
-                zip_name = f"{username_posts}_posts_media.zip"
-                st.download_button(
-                    label="💾 Download All as ZIP",
-                    data=zip_buffer,
-                    file_name=zip_name,
-                    mime="application/zip"
-                )
-
-                # 3) “Clear Media” button to remove files from server storage
-                if st.button("🗑️ Clear Downloaded Posts"):
-                    success = clear_downloaded_folder(download_dir)
-                    if success:
-                        st.success("All downloaded post files have been cleared from server storage.")
-                    else:
-                        st.warning("No downloaded post folder found to clear.")
+            fetch_tab_result(
+                "result_posts", username_posts, "posts", max_posts,
+                refresh=refresh_posts,
+                progress=f"⏳ Downloading posts for @{username_posts} …",
+                no_results=(
+                    "No posts were downloaded. "
+                    "Check the username and sessionid, then try again."
+                ),
+                summary=f"posts for @{username_posts}.",
+                zip_name=f"{username_posts}_posts_media.zip",
+            )
+
+    show_download_result("result_posts", "🗑️ Clear Downloaded Posts", "post")
 
-            except RuntimeError as e:
-                status_msg.empty()
-                st.error(f"Error: {e}")
-            except Exception as e:
-                status_msg.empty()
-                st.error(f"Unexpected error: {e}")
+with tab_posts:
+    posts_tab()
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Stories Tab
 # ──────────────────────────────────────────────────────────────────────────────
-with tab_stories:
+@st.fragment
+def stories_tab():
     st.subheader("Download & Display User Stories (Grid View)")
     with st.form(key="stories_form"):
         username_stories = st.text_input(
@@ -301,62 +844,40 @@ with tab_stories:
             key="username_stories"
         )
         submit_stories = st.form_submit_button(label="Fetch Stories")
+        refresh_stories = st.form_submit_button(
+            label="🔄 Re-download",
+            help="Ignore the result of a recent identical fetch and download again."
+        )
 
-    if submit_stories:
+    if submit_stories or refresh_stories:
+        st.session_state.pop("result_stories", None)
         if not st.session_state.sessionid:
             st.error("Cannot proceed. Please provide a sessionid above.")
         elif not username_stories:
             st.error("Please enter a username to download their stories.")
         else:
-            status_msg = st.info(f"⏳ Downloading stories for @{username_stories} …")
-            try:
-                download_dir = run_gallerydl(
-                    username_stories, "stories", st.session_state.sessionid
-                )
-                media_files = list_downloaded_media(download_dir)
-
-                status_msg.empty()
-                if not media_files:
-                    st.warning(
-                        "No stories were downloaded. "
-                        "Check the username and sessionid, then try again."
-                    )
-                    st.stop()
-
-                st.success(f"✅ Downloaded {len(media_files)} stories for @{username_stories}.")
-
-                # 1) Display media grid
-                display_media_grid_from_paths(media_files, n_cols=3)
-
-                # 2) ZIP download for convenience (only “Download All”)
-                zip_buffer = create_zip_buffer(media_files)
-                zip_name = f"{username_stories}_stories_media.zip"
-                st.download_button(
-                    label="💾 Download All as ZIP",
-                    data=zip_buffer,
-                    file_name=zip_name,
-                    mime="application/zip"
-                )
-
-                # 3) “Clear Media” button to remove files from server storage
-                if st.button("🗑️ Clear Downloaded Stories"):
-                    success = clear_downloaded_folder(download_dir)
-                    if success:
-                        st.success("All downloaded story files have been cleared from server storage.")
-                    else:
-                        st.warning("No downloaded story folder found to clear.")
+            fetch_tab_result(
+                "result_stories", username_stories, "stories",
+                refresh=refresh_stories,
+                progress=f"⏳ Downloading stories for @{username_stories} …",
+                no_results=(
+                    "No stories were downloaded. "
+                    "Check the username and sessionid, then try again."
+                ),
+                summary=f"stories for @{username_stories}.",
+                zip_name=f"{username_stories}_stories_media.zip",
+            )
+
+    show_download_result("result_stories", "🗑️ Clear Downloaded Stories", "story")
 
-            except RuntimeError as e:
-                status_msg.empty()
-                st.error(f"Error: {e}")
-            except Exception as e:
-                status_msg.empty()
-                st.error(f"Unexpected error: {e}")
+with tab_stories:
+    stories_tab()
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Reels Tab
 # ──────────────────────────────────────────────────────────────────────────────
-with tab_reels:
+@st.fragment
+def reels_tab():
     st.subheader("Download & Display User Reels (Grid View)")
     with st.form(key="reels_form"):
         username_reels = st.text_input(
@@ -370,62 +891,40 @@ with tab_reels:
             help="Limits how many of the most recent reels to download."
         )
         submit_reels = st.form_submit_button(label="Fetch Reels")
+        refresh_reels = st.form_submit_button(
+            label="🔄 Re-download",
+            help="Ignore the result of a recent identical fetch and download again."
+        )
 
-    if submit_reels:
+    if submit_reels or refresh_reels:
+        st.session_state.pop("result_reels", None)
         if not st.session_state.sessionid:
             st.error("Cannot proceed. Please provide a sessionid above.")
         elif not username_reels:
             st.error("Please enter a username to download their reels.")
         else:
-            status_msg = st.info(f"⏳ Downloading reels for @{username_reels} …")
-            try:
-                download_dir = run_gallerydl(
-                    username_reels, "reels", st.session_state.sessionid, max_reels
-                )
-                media_files = list_downloaded_media(download_dir)
-
-                status_msg.empty()
-                if not media_files:
-                    st.warning(
-                        "No reels were downloaded. "
-                        "Check the username and sessionid, then try again."
-                    )
-                    st.stop()
-
-                st.success(f"✅ Downloaded {len(media_files)} reels for @{username_reels}.")
-
-                # 1) Display media grid
-                display_media_grid_from_paths(media_files, n_cols=3)
-
-                # 2) ZIP download for convenience (only “Download All”)
-                zip_buffer = create_zip_buffer(media_files)
-                zip_name = f"{username_reels}_reels_media.zip"
-                st.download_button(
-                    label="💾 Download All as ZIP",
-                    data=zip_buffer,
-                    file_name=zip_name,
-                    mime="application/zip"
-                )
-
-                # 3) “Clear Media” button to remove files from server storage
-                if st.button("🗑️ Clear Downloaded Reels"):
-                    success = clear_downloaded_folder(download_dir)
-                    if success:
-                        st.success("All downloaded reel files have been cleared from server storage.")
-                    else:
-                        st.warning("No downloaded reel folder found to clear.")
+            fetch_tab_result(
+                "result_reels", username_reels, "reels", max_reels,
+                refresh=refresh_reels,
+                progress=f"⏳ Downloading reels for @{username_reels} …",
+                no_results=(
+                    "No reels were downloaded. "
+                    "Check the username and sessionid, then try again."
+                ),
+                summary=f"reels for @{username_reels}.",
+                zip_name=f"{username_reels}_reels_media.zip",
+            )
+
+    show_download_result("result_reels", "🗑️ Clear Downloaded Reels", "reel")
 
-            except RuntimeError as e:
-                status_msg.empty()
-                st.error(f"Error: {e}")
-            except Exception as e:
-                status_msg.empty()
-                st.error(f"Unexpected error: {e}")
+with tab_reels:
+    reels_tab()
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Highlights Tab
 # ──────────────────────────────────────────────────────────────────────────────
-with tab_highlights:
+@st.fragment
+def highlights_tab():
     st.subheader("Download & Display Highlights (Grid View)")
     with st.form(key="highlights_form"):
         highlights_url = st.text_input(
@@ -435,62 +934,40 @@ with tab_highlights:
             key="highlight_url"
         )
         submit_highlights = st.form_submit_button(label="Fetch Highlights")
+        refresh_highlights = st.form_submit_button(
+            label="🔄 Re-download",
+            help="Ignore the result of a recent identical fetch and download again."
+        )
 
-    if submit_highlights:
+    if submit_highlights or refresh_highlights:
+        st.session_state.pop("result_highlights", None)
         if not st.session_state.sessionid:
             st.error("Cannot proceed. Please provide a sessionid above.")
         elif not highlights_url:
             st.error("Please enter a valid Instagram Highlight URL.")
         else:
-            status_msg = st.info(f"⏳ Downloading highlight from: {highlights_url} …")
-            try:
-                download_dir = run_gallerydl(
-                    highlights_url, "highlights", st.session_state.sessionid
-                )
-                media_files = list_downloaded_media(download_dir)
-
-                status_msg.empty()
-                if not media_files:
-                    st.warning(
-                        "No media files were downloaded. "
-                        "Check the highlight URL and sessionid, then try again."
-                    )
-                    st.stop()
-
-                st.success(f"✅ Downloaded {len(media_files)} files from the highlight.")
-
-                # 1) Display media grid
-                display_media_grid_from_paths(media_files, n_cols=3)
-
-                # 2) ZIP download for convenience (only “Download All”)
-                zip_buffer = create_zip_buffer(media_files)
-                zip_name = f"highlight_{hash(highlights_url)}_media.zip"
-                st.download_button(
-                    label="💾 Download All as ZIP",
-                    data=zip_buffer,
-                    file_name=zip_name,
-                    mime="application/zip"
-                )
-
-                # 3) “Clear Media” button to remove files from server storage
-                if st.button("🗑️ Clear Downloaded Highlights"):
-                    success = clear_downloaded_folder(download_dir)
-                    if success:
-                        st.success("All downloaded highlight files have been cleared from server storage.")
-                    else:
-                        st.warning("No downloaded highlight folder found to clear.")
+            fetch_tab_result(
+                "result_highlights", highlights_url, "highlights",
+                refresh=refresh_highlights,
+                progress=f"⏳ Downloading highlight from: {highlights_url} …",
+                no_results=(
+                    "No media files were downloaded. "
+                    "Check the highlight URL and sessionid, then try again."
+                ),
+                summary="files from the highlight.",
+                zip_name=f"highlight_{_stable_id(highlights_url)}_media.zip",
+            )
+
+    show_download_result("result_highlights", "🗑️ Clear Downloaded Highlights", "highlight")
 
-            except RuntimeError as e:
-                status_msg.empty()
-                st.error(f"Error: {e}")
-            except Exception as e:
-                status_msg.empty()
-                st.error(f"Unexpected error: {e}")
+with tab_highlights:
+    highlights_tab()
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Tagged Posts Tab
 # ──────────────────────────────────────────────────────────────────────────────
-with tab_tagged:
+@st.fragment
+def tagged_tab():
     st.subheader("Download & Display Tagged Posts (Grid View)")
     with st.form(key="tagged_form"):
         username_tagged = st.text_input(
@@ -504,119 +981,79 @@ with tab_tagged:
             help="Limits how many of the most recent tagged posts to download."
         )
         submit_tagged = st.form_submit_button(label="Fetch Tagged Posts")
+        refresh_tagged = st.form_submit_button(
+            label="🔄 Re-download",
+            help="Ignore the result of a recent identical fetch and download again."
+        )
 
-    if submit_tagged:
+    if submit_tagged or refresh_tagged:
+        st.session_state.pop("result_tagged", None)
         if not st.session_state.sessionid:
             st.error("Cannot proceed. Please provide a sessionid above.")
         elif not username_tagged:
             st.error("Please enter a username to download their tagged posts.")
         else:
-            status_msg = st.info(f"⏳ Downloading tagged posts for @{username_tagged} …")
-            try:
-                download_dir = run_gallerydl(
-                    username_tagged, "tagged", st.session_state.sessionid, max_tagged
-                )
-                media_files = list_downloaded_media(download_dir)
-
-                status_msg.empty()
-                if not media_files:
-                    st.warning(
-                        "No tagged posts were downloaded. "
-                        "Check the username and sessionid, then try again."
-                    )
-                    st.stop()
-
-                st.success(f"✅ Downloaded {len(media_files)} tagged posts for @{username_tagged}.")
-
-                # 1) Display media grid
-                display_media_grid_from_paths(media_files, n_cols=3)
-
-                # 2) ZIP download for convenience (only “Download All”)
-                zip_buffer = create_zip_buffer(media_files)
-                zip_name = f"{username_tagged}_tagged_media.zip"
-                st.download_button(
-                    label="💾 Download All as ZIP",
-                    data=zip_buffer,
-                    file_name=zip_name,
-                    mime="application/zip"
-                )
-
-                # 3) “Clear Media” button to remove files from server storage
-                if st.button("🗑️ Clear Downloaded Tagged Posts"):
-                    success = clear_downloaded_folder(download_dir)
-                    if success:
-                        st.success("All downloaded tagged-post files have been cleared from server storage.")
-                    else:
-                        st.warning("No downloaded tagged-post folder found to clear.")
+            fetch_tab_result(
+                "result_tagged", username_tagged, "tagged", max_tagged,
+                refresh=refresh_tagged,
+                progress=f"⏳ Downloading tagged posts for @{username_tagged} …",
+                no_results=(
+                    "No tagged posts were downloaded. "
+                    "Check the username and sessionid, then try again."
+                ),
+                summary=f"tagged posts for @{username_tagged}.",
+                zip_name=f"{username_tagged}_tagged_media.zip",
+            )
+
+    show_download_result("result_tagged", "🗑️ Clear Downloaded Tagged Posts", "tagged-post")
 
-            except RuntimeError as e:
-                status_msg.empty()
-                st.error(f"Error: {e}")
-            except Exception as e:
-                status_msg.empty()
-                st.error(f"Unexpected error: {e}")
+with tab_tagged:
+    tagged_tab()
 
 # ──────────────────────────────────────────────────────────────────────────────
 # URL Input Tab
 # ──────────────────────────────────────────────────────────────────────────────
-with tab_url:
+@st.fragment
+def url_tab():
     st.subheader("Download & Display from Custom URL (Grid View)")
     with st.form(key="url_form"):
-        custom_url = st.text_input(
-            "Instagram URL",
+        custom_url = st.text_area(
+            "Instagram URL(s)",
             placeholder="e.g., https://www.instagram.com/p/XXXXXXXXXXX/",
-            help="Paste any valid Instagram URL (post, story, reel, highlight, profile, etc.).",
+            help=(
+                "Paste any valid Instagram URL (post, story, reel, highlight, profile, etc.). "
+                "Add more on separate lines to fetch them all in one go."
+            ),
             key="custom_url"
         )
         submit_url = st.form_submit_button(label="Fetch from URL")
+        refresh_url = st.form_submit_button(
+            label="🔄 Re-download",
+            help="Ignore the result of a recent identical fetch and download again."
+        )
 
-    if submit_url:
+    if submit_url or refresh_url:
+        st.session_state.pop("result_url", None)
         if not st.session_state.sessionid:
             st.error("Cannot proceed. Please provide a sessionid above.")
-        elif not custom_url:
+        elif not custom_url.strip():
             st.error("Please enter a valid Instagram URL.")
         else:
-            status_msg = st.info(f"⏳ Downloading media from: {custom_url} …")
-            try:
-                download_dir = run_gallerydl(
-                    custom_url, "url", st.session_state.sessionid
-                )
-                media_files = list_downloaded_media(download_dir)
-
-                status_msg.empty()
-                if not media_files:
-                    st.warning(
-                        "No media files were downloaded. "
-                        "Check the URL and sessionid, then try again."
-                    )
-                    st.stop()
-
-                st.success(f"✅ Downloaded {len(media_files)} files from the URL.")
-
-                # 1) Display media grid
-                display_media_grid_from_paths(media_files, n_cols=3)
-
-                # 2) ZIP download for convenience (only “Download All”)
-                zip_buffer = create_zip_buffer(media_files)
-                zip_name = f"url_{hash(custom_url)}_media.zip"
-                st.download_button(
-                    label="💾 Download All as ZIP",
-                    data=zip_buffer,
-                    file_name=zip_name,
-                    mime="application/zip"
-                )
-
-                # 3) “Clear Media” button to remove files from server storage
-                if st.button("🗑️ Clear Downloaded URL Media"):
-                    success = clear_downloaded_folder(download_dir)
-                    if success:
-                        st.success("All downloaded URL media files have been cleared from server storage.")
-                    else:
-                        st.warning("No downloaded URL folder found to clear.")
+            # Pasting the same link twice would otherwise fetch it twice
+            urls = list(dict.fromkeys(custom_url.split()))
+            fetch_tab_result(
+                "result_url", "\n".join(urls), "url",
+                refresh=refresh_url,
+                progress=f"⏳ Downloading media from: {', '.join(urls)} …",
+                no_results=(
+                    "No media files were downloaded. "
+                    "Check the URL and sessionid, then try again."
+                ),
+                summary=f"files from {len(urls)} URL(s).",
+                zip_name=f"url_{_stable_id(custom_url)}_media.zip",
+            )
+
+    show_download_result("result_url", "🗑️ Clear Downloaded URL Media", "URL media")
 
-            except RuntimeError as e:
-                status_msg.empty()
-                st.error(f"Error: {e}")
-            except Exception as e:
-                status_msg.empty()
-                st.error(f"Unexpected error: {e}")
+with tab_url:
+    url_tab()